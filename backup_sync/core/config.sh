@@ -14,6 +14,13 @@ SYNC_EXIST_START=false
 NOTIFY_SERVICE=""
 LOG_LEVEL="info"
 
+# Вычисляется один раз после валидации: /media/<mount_point>
+TARGET_DIR=""
+
+# Предел для lsblk (detect.sh, checks.sh): зависшее устройство
+# не должно блокировать старт
+STORAGE_PROBE_TIMEOUT=5
+
 load_config() {
 
   if [ ! -f "${CONFIG_FILE}" ]; then
@@ -21,13 +28,21 @@ load_config() {
     exit 1
   fi
 
-  # Читаем значения из options.json
-  USB_DEVICE=$(jq -r '.usb_device // ""' "${CONFIG_FILE}")
-  MOUNT_POINT=$(jq -r '.mount_point // ""' "${CONFIG_FILE}")
-  MAX_COPIES=$(jq -r '.max_copies // 0' "${CONFIG_FILE}")
-  SYNC_EXIST_START=$(jq -r '.sync_exis_start // false' "${CONFIG_FILE}")
-  NOTIFY_SERVICE=$(jq -r '.notify_service // ""' "${CONFIG_FILE}")
-  LOG_LEVEL=$(jq -r '.log_level // "info"' "${CONFIG_FILE}")
+  # Читаем значения из options.json за один запуск jq
+  # (@sh экранирует значения для безопасного eval)
+  local assignments
+  if ! assignments=$(jq -r '@sh "
+    USB_DEVICE=\(.usb_device // "")
+    MOUNT_POINT=\(.mount_point // "")
+    MAX_COPIES=\(.max_copies // 0)
+    SYNC_EXIST_START=\(.sync_exis_start // false)
+    NOTIFY_SERVICE=\(.notify_service // "")
+    LOG_LEVEL=\(.log_level // "info")
+  "' "${CONFIG_FILE}"); then
+    log_fatal "Config file ${CONFIG_FILE} is not valid JSON"
+    exit 1
+  fi
+  eval "${assignments}"
 
   # Устанавливаем уровень логирования
   set_log_level "${LOG_LEVEL}"
@@ -58,6 +73,12 @@ _validate_config() {
     exit 1
   fi
 
+  # Хвостовые "/" убираем, чтобы путь совпадал с записью в mountinfo
+  while [[ "${MOUNT_POINT}" == */ ]]; do
+    MOUNT_POINT="${MOUNT_POINT%/}"
+  done
+  TARGET_DIR="/media/${MOUNT_POINT}"
+
   # log_level валидируется set_log_level, тут только лог
   log_debug "Config validation passed"
 }
@@ -4,14 +4,14 @@
 # Logging utility for addon
 # =========================
 
-# Цвета (ANSI)
-COLOR_RESET="\033[0m"
-
-COLOR_FATAL="\033[1;31m"   # ярко-красный
-COLOR_ERROR="\033[0;31m"   # красный
-COLOR_WARN="\033[0;33m"    # жёлтый
-COLOR_INFO="\033[0;32m"    # зелёный
-COLOR_DEBUG="\033[0;36m"   # циан
+# Цвета (ANSI), escape-последовательности раскрыты заранее
+COLOR_RESET=$'\033[0m'
+
+COLOR_FATAL=$'\033[1;31m'   # ярко-красный
+COLOR_ERROR=$'\033[0;31m'   # красный
+COLOR_WARN=$'\033[0;33m'    # жёлтый
+COLOR_INFO=$'\033[0;32m'    # зелёный
+COLOR_DEBUG=$'\033[0;36m'   # циан
 COLOR_OFF=""
 
 # Уровни логов (по возрастанию подробности)
@@ -30,15 +30,17 @@ CURRENT_LOG_LEVEL=${LOG_LEVEL_INFO}
 # =========================
 
 _log() {
+  # Отфильтрованный уровень - выходим до сборки сообщения
+  if [ "${CURRENT_LOG_LEVEL}" -lt "$2" ]; then
+    return 0
+  fi
+
   local level_name="$1"
-  local level_value="$2"
   local color="$3"
   shift 3
-  local message="$*"
 
-  if [ "${CURRENT_LOG_LEVEL}" -ge "${level_value}" ]; then
-    echo -e "${color}[${level_name}]${COLOR_RESET} ${message}"
-  fi
+  # printf без разбора escape-последовательностей в самом сообщении
+  printf '%s[%s]%s %s\n' "${color}" "${level_name}" "${COLOR_RESET}" "$*"
 }
 
 # =========================
@@ -1,14 +1,34 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import json
-import subprocess
+import http.client
 from pathlib import Path
 
 OPTIONS_FILE = Path("/data/options.json")
+SUPERVISOR_HOST = "supervisor"
+SUPERVISOR_TOKEN = os.environ.get("SUPERVISOR_TOKEN", "")
+
+# Отдельные таймауты: недоступный supervisor отваливается быстро,
+# а на ответ (HA Core может перезапускаться) даём чуть больше времени
+CONNECT_TIMEOUT = 2
+READ_TIMEOUT = 5
+
+# Токен не меняется за время жизни процесса - заголовки собираем один раз
+_AUTH_HEADER = f"Bearer {SUPERVISOR_TOKEN}"
+_HEADERS = {
+    "Authorization": _AUTH_HEADER,
+    "Content-Type": "application/json",
+}
 
 
 def load_notify_service():
+    # run.sh уже прочитал options.json и передаёт значение через окружение
+    service = os.environ.get("NOTIFY_SERVICE")
+    if service is not None:
+        return service
+
     if not OPTIONS_FILE.exists():
         return ""
 
@@ -20,25 +40,36 @@ def load_notify_service():
         return ""
 
 
+def service_path(service):
+    """Строит путь сервиса HA из имени вида domain.service"""
+    if "." in service:
+        domain, service_name = service.split(".", 1)
+    elif service == "persistent_notification":
+        domain, service_name = service, "create"
+    else:
+        domain, service_name = service, service
+
+    return f"/core/api/services/{domain}/{service_name}"
+
+
 def send_notification(service, title, message):
+    """Отправляет уведомление через Supervisor API (stdlib http.client, без fork)"""
     payload = {
         "title": title,
         "message": message,
     }
 
-    cmd = [
-        "curl",
-        "-s",
-        "-X", "POST",
-        "-H", "Content-Type: application/json",
-        "-d", json.dumps(payload),
-        f"http://supervisor/core/api/services/{service.replace('.', '/')}",
-    ]
-
+    conn = http.client.HTTPConnection(SUPERVISOR_HOST, timeout=CONNECT_TIMEOUT)
     try:
-        subprocess.run(cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        conn.connect()
+        conn.sock.settimeout(READ_TIMEOUT)
+        conn.request("POST", service_path(service), body=json.dumps(payload), headers=_HEADERS)
+        # Тело ответа (список изменённых state) не нужно - не читаем его
+        conn.getresponse().close()
     except Exception:
         pass
+    finally:
+        conn.close()
 
 
 def main():
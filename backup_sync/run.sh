@@ -29,6 +29,13 @@ source "${BASE_DIR}/sync/copier.sh"
 # =========================
 NOTIFY_BIN="${BASE_DIR}/notifi/ha_notify.py"
 
+# notify <level> <title> <message>
+# Без настроенного сервиса python не запускаем вовсе
+notify() {
+  [ -n "${NOTIFY_SERVICE:-}" ] || return 0
+  python3 "${NOTIFY_BIN}" "$@"
+}
+
 # =========================
 # Exit handler
 # =========================
@@ -44,6 +51,9 @@ log_info "Backup Sync addon starting..."
 load_config
 state_load
 
+# ha_notify.py берёт сервис отсюда, не перечитывая options.json
+export NOTIFY_SERVICE
+
 log_info "Configuration:"
 log_info "  usb_device        = ${USB_DEVICE:-<not set>}"
 log_info "  mount_point       = ${MOUNT_POINT}"
@@ -62,11 +72,9 @@ if [ -z "${USB_DEVICE:-}" ]; then
 
   state_set LAST_ERROR "usb_device not configured"
 
-  if [ -n "${NOTIFY_SERVICE:-}" ]; then
-    python3 "${NOTIFY_BIN}" fatal \
-      "Backup Sync addon stopped" \
-      "Reason: usb_device not configured"
-  fi
+  notify fatal \
+    "Backup Sync addon stopped" \
+    "Reason: usb_device not configured"
 
   log_fatal "Please configure usb_device and restart addon"
   exit 1
@@ -81,11 +89,9 @@ log_info "Running storage checks"
 if ! check_storage; then
   state_set LAST_ERROR "Storage checks failed"
 
-  if [ -n "${NOTIFY_SERVICE:-}" ]; then
-    python3 "${NOTIFY_BIN}" fatal \
-      "Backup Sync addon stopped" \
-      "Reason: Storage checks failed"
-  fi
+  notify fatal \
+    "Backup Sync addon stopped" \
+    "Reason: Storage checks failed"
 
   log_fatal "Storage checks failed"
   exit 1
@@ -98,11 +104,9 @@ fi
 if ! mount_usb; then
   state_set LAST_ERROR "USB bind-mount failed"
 
-  if [ -n "${NOTIFY_SERVICE:-}" ]; then
-    python3 "${NOTIFY_BIN}" fatal \
-      "Backup Sync addon stopped" \
-      "Reason: USB bind-mount failed"
-  fi
+  notify fatal \
+    "Backup Sync addon stopped" \
+    "Reason: USB bind-mount failed"
 
   log_fatal "USB bind-mount failed"
   exit 1
@@ -115,11 +119,9 @@ fi
 if ! check_target; then
   state_set LAST_ERROR "Target directory check failed"
 
-  if [ -n "${NOTIFY_SERVICE:-}" ]; then
-    python3 "${NOTIFY_BIN}" fatal \
-      "Backup Sync addon stopped" \
-      "Reason: Target directory check failed"
-  fi
+  notify fatal \
+    "Backup Sync addon stopped" \
+    "Reason: Target directory check failed"
 
   log_fatal "Target directory check failed"
   exit 1
@@ -129,6 +131,11 @@ fi
 # STATE 5 — ЗАПУСК WATCHER ПЕРВЫМ (ВСЕГДА)
 # =========================
 
+# Очередь строится заново на каждом старте: дескриптор главного цикла
+# читает её с начала, и оставшиеся от прошлого запуска строки
+# скопировались бы повторно
+: > "${QUEUE_FILE}"
+
 log_info "Starting watcher"
 
 # Запускаем watcher в фоне, перенаправляем вывод в лог
@@ -157,11 +164,9 @@ if ! kill -0 "$WATCHER_PID" 2>/dev/null; then
     state_set LAST_ERROR "Watcher failed to start (no log)"
   fi
   
-  if [ -n "${NOTIFY_SERVICE:-}" ]; then
-    python3 "${NOTIFY_BIN}" fatal \
-      "Backup Sync addon stopped" \
-      "Reason: Watcher failed to start"
-  fi
+  notify fatal \
+    "Backup Sync addon stopped" \
+    "Reason: Watcher failed to start"
   
   log_fatal "Watcher failed to start"
   exit 1
@@ -184,11 +189,11 @@ if [ "${SYNC_EXIST_START}" = "true" ]; then
         EVENT:SCANNER_ENQUEUED:*)
           file="${line#EVENT:SCANNER_ENQUEUED:}"
           state_inc TOTAL_FOUND
-          log_debug "Scanner queued: $(basename "$file")"
+          log_debug "Scanner queued: ${file##*/}"
           ;;
         EVENT:SCANNER_SKIPPED:*)
           file="${line#EVENT:SCANNER_SKIPPED:}"
-          [ "$LOG_LEVEL" = "debug" ] && log_debug "Scanner skipped: $file"
+          log_debug "Scanner skipped: $file"
           ;;
         EVENT:SCANNER_DONE:*)
           count="${line#EVENT:SCANNER_DONE:}"
@@ -211,6 +216,18 @@ fi
 
 log_info "Initialization complete. Entering main loop."
 
+# Скопированные, но ещё не объявленные в уведомлении файлы
+COPIED_PENDING=()
+
+# Очистка нужна только когда на USB появился новый бэкап
+# (и один раз при старте), а не на каждом холостом опросе очереди
+CLEANUP_NEEDED=true
+
+# Очередь читаем через постоянный дескриптор: позиция чтения сама
+# сдвигается, а файл не переписывается (watcher держит его открытым
+# с O_APPEND, и sed -i подменил бы inode под ним)
+exec 3< "${QUEUE_FILE}"
+
 while true; do
   # Периодически проверяем, жив ли watcher
   if ! kill -0 "$WATCHER_PID" 2>/dev/null; then
@@ -227,26 +244,20 @@ while true; do
       state_set LAST_ERROR "Watcher process died (no log)"
     fi
     
-    if [ -n "${NOTIFY_SERVICE:-}" ]; then
-      python3 "${NOTIFY_BIN}" fatal \
-        "Backup Sync addon stopped" \
-        "Reason: Watcher process died"
-    fi
+    notify fatal \
+      "Backup Sync addon stopped" \
+      "Reason: Watcher process died"
     
     log_fatal "Watcher process died"
     exit 1
   fi
   
   # Обрабатываем очередь
-  if [ -s "${QUEUE_FILE}" ]; then
-    # Читаем первый файл из очереди
-    read -r backup_file < "${QUEUE_FILE}"
+  if read -r -u 3 backup_file; then
+    # Следующий файл из очереди
     state_inc TOTAL_FOUND
 
-    # Удаляем обработанную строку из очереди
-    sed -i '1d' "${QUEUE_FILE}"
-    
-    filename="$(basename "${backup_file}")"
+    filename="${backup_file##*/}"
     log_debug "Processing backup: ${filename}"
     
     # Проверяем, существует ли файл
@@ -267,12 +278,9 @@ while true; do
       state_set LAST_SYNC_TIME "$(date +%s)"
       state_set LAST_ERROR ""
       
-      # УВЕДОМЛЕНИЕ ОБ УСПЕХЕ
-      if [ -n "${NOTIFY_SERVICE:-}" ]; then
-        python3 "${NOTIFY_BIN}" success \
-          "Backup saved successfully" \
-          "File: ${filename}"
-      fi
+      # УВЕДОМЛЕНИЕ ОБ УСПЕХЕ копим до опустошения очереди
+      COPIED_PENDING+=("${filename}")
+      CLEANUP_NEEDED=true
       
     else
       # Ошибка копирования
@@ -282,19 +290,35 @@ while true; do
       state_inc TOTAL_FAILED
       state_set LAST_ERROR "Copy failed: ${filename}"
       
-      # УВЕДОМЛЕНИЕ ОБ ОШИБКЕ
-      if [ -n "${NOTIFY_SERVICE:-}" ]; then
-        python3 "${NOTIFY_BIN}" error \
-          "Backup copy failed" \
-          "File: ${filename}"
-      fi
+      # УВЕДОМЛЕНИЕ ОБ ОШИБКЕ (в фоне, чтобы не задерживать очередь)
+      notify error \
+        "Backup copy failed" \
+        "File: ${filename}" &
     fi
   else
+    # Очередь опустела - одно уведомление на всю пачку скопированных
+    if [ "${#COPIED_PENDING[@]}" -gt 0 ]; then
+      if [ "${#COPIED_PENDING[@]}" -eq 1 ]; then
+        notify success \
+          "Backup saved successfully" \
+          "File: ${COPIED_PENDING[0]}" &
+      else
+        printf -v copied_list '%s, ' "${COPIED_PENDING[@]}"
+        notify success \
+          "${#COPIED_PENDING[@]} backups saved successfully" \
+          "Files: ${copied_list%, }" &
+      fi
+      COPIED_PENDING=()
+    fi
+
     # Очищаем старые бэкапы (если нужно)
-    if cleanup_backups; then
-      log_debug "Cleanup completed"
-    else
-      log_warn "Cleanup had issues"
+    if [ "${CLEANUP_NEEDED}" = "true" ]; then
+      if cleanup_backups; then
+        log_debug "Cleanup completed"
+      else
+        log_warn "Cleanup had issues"
+      fi
+      CLEANUP_NEEDED=false
     fi
 
     # Очередь пуста - небольшая пауза
@@ -1,39 +1,53 @@
 #!/usr/bin/env bash
 
 check_storage() {
-  # 1. Source directory (/backup)
+  # Порядок: сначала проверки без syscall, затем stat, затем fork
+
+  # 1. Protect system disks (чистое сравнение строк)
+  case "${USB_DEVICE}" in
+    sda*|mmcblk0*|nvme0n1*)
+      log_error "Refusing to use system device: ${USB_DEVICE}"
+      return 1
+      ;;
+  esac
+
+  # 2. Source directory (/backup)
   if [ ! -d "/backup" ]; then
     log_error "Source directory /backup does not exist"
     return 1
   fi
   log_info "Source directory /backup OK"
 
-  # 2. Device exists
+  # 3-4. Device exists and is a block device
+  # Один stat на успешном пути; -e нужен только для текста ошибки
   local device="/dev/${USB_DEVICE}"
 
-  if [ ! -e "${device}" ]; then
-    log_error "Device ${device} does not exist"
+  if [ ! -b "${device}" ]; then
+    if [ ! -e "${device}" ]; then
+      log_error "Device ${device} does not exist"
+    else
+      log_error "Device ${device} is not a block device"
+    fi
     return 1
   fi
   log_info "Device ${device} exists"
 
-  # 3. Must be block device
-  if [ ! -b "${device}" ]; then
-    log_error "Device ${device} is not a block device"
-    return 1
-  fi
+  # 5. Filesystem detection
+  # Уже смонтированное устройство берём из mountinfo без fork,
+  # lsblk нужен только для ещё не смонтированного
+  local fstype=""
+  local src_mount
 
-  # 4. Protect system disks
-  case "${USB_DEVICE}" in
-    sda*|mmcblk0*|nvme0n1*)
-      log_error "Refusing to use system device: ${USB_DEVICE}"
-      return 1
-      ;;
-  esac
+  mountinfo_load
+  src_mount="${MOUNT_TARGET_BY_SOURCE["${device}"]:-}"
 
-  # 5. Filesystem detection
-  local fstype
-  fstype="$(lsblk -no FSTYPE "${device}" 2>/dev/null || true)"
+  if [ -n "${src_mount}" ]; then
+    fstype="${MOUNT_FSTYPE_BY_TARGET["${src_mount}"]:-}"
+  fi
+
+  if [ -z "${fstype}" ]; then
+    fstype="$(timeout "${STORAGE_PROBE_TIMEOUT}" lsblk -no FSTYPE "${device}" 2>/dev/null || true)"
+  fi
 
   if [ -z "${fstype}" ]; then
     log_error "Filesystem not detected on ${device}"
@@ -46,7 +60,7 @@ check_storage() {
 }
 
 check_target() {
-  local target="/media/${MOUNT_POINT}"
+  local target="${TARGET_DIR}"
 
   log_info "Checking target directory ${target}"
 
@@ -56,22 +70,21 @@ check_target() {
     return 1
   fi
 
-  # 2. Is mountpoint
-  if ! findmnt --target "${target}" >/dev/null 2>&1; then
+  # 2. Is mountpoint (exact match in mountinfo, no findmnt fork)
+  mountinfo_load
+
+  if [ -z "${MOUNT_FSTYPE_BY_TARGET["${target}"]+x}" ]; then
     log_error "Target ${target} is not a mountpoint"
     return 1
   fi
 
   # 3. Writable test
-  local testfile="${target}/.write_test"
-
-  if ! touch "${testfile}" 2>/dev/null; then
+  # access(W_OK) учитывает и read-only mount (EROFS), без touch/rm
+  if [ ! -w "${target}" ]; then
     log_error "Target ${target} is not writable"
     return 1
   fi
 
-  rm -f "${testfile}"
-
   log_info "Target directory ${target} OK"
   return 0
 }
@@ -8,7 +8,7 @@ set -euo pipefail
 
 cleanup_backups() {
 
-  local target_dir="/media/${MOUNT_POINT}"
+  local target_dir="${TARGET_DIR}"
 
   if [ ! -d "${target_dir}" ]; then
     log_error "Cleanup skipped: target directory does not exist (${target_dir})"
@@ -18,10 +18,20 @@ cleanup_backups() {
   log_info "Running cleanup in ${target_dir}"
   log_info "Keeping last ${MAX_COPIES} backups"
 
+  # Один проход по каталогу вместо двух glob: *.tar* и отбор по суффиксу
+  local -a candidates=()
+  local f
+  for f in "${target_dir}"/*.tar*; do
+    case "${f}" in
+      *.tar|*.tar.gz) [ -f "${f}" ] && candidates+=("${f}") ;;
+    esac
+  done
+
   # Получаем список backup-файлов (новые сверху)
-  mapfile -t backups < <(
-    ls -1t "${target_dir}"/*.tar "${target_dir}"/*.tar.gz 2>/dev/null || true
-)
+  local -a backups=()
+  if [ "${#candidates[@]}" -gt 0 ]; then
+    mapfile -t backups < <(ls -1t -- "${candidates[@]}")
+  fi
 
   local total="${#backups[@]}"
 
@@ -6,37 +6,40 @@
 
 set -euo pipefail
 
-# Фильтры системных дисков
-SYSTEM_DISKS_REGEX="^(sda|mmcblk0|zram)"    
-
 detect_devices() {
 
   log_info "Scanning available storage devices..."
 
-  # Получаем список partition:
-  # NAME TYPE FSTYPE SIZE
-  lsblk -pn -o NAME,TYPE,FSTYPE,SIZE \
-    | while read -r name type fstype size; do
+  # Получаем список partition в формате KEY="value":
+  # пустой FSTYPE не сдвигает колонки, как при разборе по пробелам.
+  # Небезопасные символы lsblk экранирует как \xNN, поэтому eval безопасен.
+  timeout "${STORAGE_PROBE_TIMEOUT}" lsblk -P -p -o NAME,TYPE,FSTYPE,SIZE \
+    | while read -r line; do
+
+        local NAME="" TYPE="" FSTYPE="" SIZE=""
+        eval "${line}"
 
         # Нас интересуют только partition
-        [ "${type}" != "part" ] && continue
+        [ "${TYPE}" != "part" ] && continue
 
-        base_name="$(basename "${name}")"
+        base_name="${NAME##*/}"
 
-        # Фильтруем системные диски
-        if [[ "${base_name}" =~ ${SYSTEM_DISKS_REGEX} ]]; then
-          log_debug "Skipping system device ${base_name}"
-          continue
-        fi
+        # Фильтруем системные диски (glob в case, без regcomp на строку)
+        case "${base_name}" in
+          sda*|mmcblk0*|zram*)
+            log_debug "Skipping system device ${base_name}"
+            continue
+            ;;
+        esac
 
         # Должна быть файловая система
-        if [ -z "${fstype}" ]; then
+        if [ -z "${FSTYPE}" ]; then
           log_debug "Skipping ${base_name} (no filesystem)"
           continue
         fi
 
         # Формируем строку для вывода
-          log_info "${base_name} (${fstype}, ${size})"
+          log_info "${base_name} (${FSTYPE}, ${SIZE})"
     done
 }
 
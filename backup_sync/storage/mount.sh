@@ -1,8 +1,59 @@
 #!/usr/bin/env bash
 
+# =========================
+# Mount table (/proc/self/mountinfo)
+# =========================
+
+MOUNTINFO_FILE="/proc/self/mountinfo"
+
+declare -A MOUNT_TARGET_BY_SOURCE=()
+declare -A MOUNT_FSTYPE_BY_TARGET=()
+MOUNTINFO_LOADED=false
+
+# Один проход по mountinfo вместо отдельного findmnt на каждый вопрос.
+# Поля: ... 4=mount point ... "-" fstype source ...
+# Результат кэшируется до mountinfo_invalidate (вызывается после mount).
+mountinfo_load() {
+  if [ "${MOUNTINFO_LOADED}" = "true" ]; then
+    return 0
+  fi
+
+  MOUNT_TARGET_BY_SOURCE=()
+  MOUNT_FSTYPE_BY_TARGET=()
+
+  local fields i target fstype source
+
+  while read -r -a fields; do
+    for ((i = 6; i < ${#fields[@]}; i++)); do
+      if [ "${fields[i]}" = "-" ]; then
+        break
+      fi
+    done
+
+    # Пути в mountinfo экранированы (\040 = пробел)
+    printf -v target '%b' "${fields[4]}"
+    printf -v source '%b' "${fields[i + 2]:-}"
+    fstype="${fields[i + 1]:-}"
+
+    MOUNT_FSTYPE_BY_TARGET["${target}"]="${fstype}"
+
+    # Первое монтирование устройства считаем основным
+    if [ -n "${source}" ] && [ -z "${MOUNT_TARGET_BY_SOURCE["${source}"]:-}" ]; then
+      MOUNT_TARGET_BY_SOURCE["${source}"]="${target}"
+    fi
+  done < "${MOUNTINFO_FILE}"
+
+  MOUNTINFO_LOADED=true
+  return 0
+}
+
+mountinfo_invalidate() {
+  MOUNTINFO_LOADED=false
+}
+
 mount_usb() {
   local device="/dev/${USB_DEVICE}"
-  local target="/media/${MOUNT_POINT}"
+  local target="${TARGET_DIR}"
 
   log_info "Preparing USB mount"
   log_info "  Device : ${device}"
@@ -17,21 +68,23 @@ mount_usb() {
     }
   fi
 
+  mountinfo_load
+
   # 1. Target already mounted → OK
-  if findmnt --target "${target}" >/dev/null 2>&1; then
+  if [ -n "${MOUNT_FSTYPE_BY_TARGET["${target}"]+x}" ]; then
     log_info "Target ${target} is already mounted"
     return 0
   fi
 
   # 2. Device already mounted somewhere → bind-mount
-  local src_mount
-  src_mount="$(findmnt -n -o TARGET --source "${device}" 2>/dev/null || true)"
+  local src_mount="${MOUNT_TARGET_BY_SOURCE["${device}"]:-}"
 
   if [ -n "${src_mount}" ]; then
     log_info "Device ${device} already mounted at ${src_mount}"
     log_info "Bind-mounting ${src_mount} → ${target}"
 
     if mount --bind "${src_mount}" "${target}"; then
+      mountinfo_invalidate
       log_info "Bind-mount successful"
       return 0
     else
@@ -44,6 +97,7 @@ mount_usb() {
   log_info "Device ${device} not mounted, mounting directly to ${target}"
 
   if mount "${device}" "${target}"; then
+    mountinfo_invalidate
     log_info "Direct mount successful"
     return 0
   fi
@@ -7,12 +7,13 @@
 set -euo pipefail
 
 RETRY_COUNT=3
-RETRY_DELAY=600
+RETRY_DELAY=60       # первая пауза, дальше удваивается (60, 120)
+BYTES_PER_MB=1048576
 
 copy_backup() {
 
   local source_file="$1"
-  local target_dir="/media/${MOUNT_POINT}"
+  local target_dir="${TARGET_DIR}"
 
   if [ -z "${source_file}" ]; then
     log_error "No source file provided to copier"
@@ -33,21 +34,35 @@ copy_backup() {
   filename="$(basename "${source_file}")"
   local target_file="${target_dir}/${filename}"
 
+  # Существующей копии доверяем только при совпадении размера:
+  # обрезанный файл иначе остался бы на USB навсегда
   if [ -f "${target_file}" ]; then
-    log_info "Backup already exists on USB, skipping: ${filename}"
-    return 0  # Уже есть - считаем успехом
+    if [ "$(stat -L -c %s "${target_file}" 2>/dev/null)" = "$(stat -L -c %s "${source_file}" 2>/dev/null)" ]; then
+      log_info "Backup already exists on USB, skipping: ${filename}"
+      return 0  # Уже есть - считаем успехом
+    fi
+    log_warn "Backup on USB differs in size, copying again: ${filename}"
   fi
 
   log_info "Starting copy: ${filename}"
 
   local attempt=1
+  local delay="${RETRY_DELAY}"
   while [ "${attempt}" -le "${RETRY_COUNT}" ]; do
 
     local start_ts
     start_ts=$(date +%s)
 
     if cp -f "${source_file}" "${target_file}"; then
-      sync
+      # fsync только скопированного файла и его каталога (новая запись
+      # в директории тоже должна дойти до USB), а не всех файловых систем
+      sync "${target_file}" "${target_dir}"
+
+      # Бэкап читается один раз: убираем его страницы из page cache
+      # (и исходник, и уже сброшенную на диск копию), чтобы не
+      # вытеснять кэш самого HA
+      dd if="${source_file}" iflag=nocache count=0 status=none 2>/dev/null || true
+      dd of="${target_file}" oflag=nocache conv=notrunc count=0 status=none 2>/dev/null || true
 
       local end_ts
       end_ts=$(date +%s)
@@ -55,7 +70,7 @@ copy_backup() {
       local duration=$((end_ts - start_ts))
       local size_bytes
       size_bytes=$(stat -c %s "${target_file}")
-      local size_mb=$((size_bytes / 1024 / 1024))
+      local size_mb=$((size_bytes / BYTES_PER_MB))
 
       log_info "Copy completed: ${filename}"
       log_info "Size: ${size_mb} MB, Time: ${duration}s"
@@ -68,8 +83,12 @@ copy_backup() {
     log_warn "Copy failed for ${filename}"
 
     if [ "${attempt}" -lt "${RETRY_COUNT}" ]; then
-      log_warn "Retrying in ${RETRY_DELAY} seconds"
-      sleep "${RETRY_DELAY}"
+      # Небольшой разброс, чтобы повторы не совпадали с чужими
+      local pause=$((delay + RANDOM % 5))
+      log_warn "Retrying in ${pause} seconds"
+      sleep "${pause}"
+
+      delay=$((delay * 2))
     fi
 
     attempt=$((attempt + 1))
@@ -2,60 +2,94 @@
 
 import sys
 import os
-from pathlib import Path
+import stat
+from operator import itemgetter
 
-BACKUP_DIR = Path("/backup")
-QUEUE_FILE = Path("/tmp/backup_sync.queue")
+BACKUP_DIR = "/backup"
+QUEUE_FILE = "/tmp/backup_sync.queue"
+BACKUP_SUFFIXES = (".tar", ".tar.gz")
+
+_events = []
 
 def emit(event: str):
-    """Вывод события в stdout"""
-    print(event, flush=True)
+    """Копит событие; в stdout оно уходит через flush_events()"""
+    _events.append(event + "\n")
+
+def flush_events():
+    """Выводит накопленные события одной записью"""
+    if _events:
+        sys.stdout.write("".join(_events))
+        sys.stdout.flush()
+        _events.clear()
 
-def check_target_dir(target_dir: Path) -> bool:
+def check_target_dir(target_dir: str) -> bool:
     """Проверяет, что целевая директория доступна"""
-    if not target_dir.exists():
+    # Один stat отвечает и на "существует", и на "директория"
+    try:
+        st = os.stat(target_dir)
+    except OSError:
         emit(f"EVENT:FATAL:TARGET_DIR_NOT_EXISTS:{target_dir}")
         return False
     
-    if not target_dir.is_dir():
+    if not stat.S_ISDIR(st.st_mode):
         emit(f"EVENT:FATAL:TARGET_NOT_DIR:{target_dir}")
         return False
     
-    # Проверяем возможность записи (опционально)
-    try:
-        test_file = target_dir / ".write_test"
-        test_file.touch()
-        test_file.unlink()
-    except Exception as e:
-        emit(f"EVENT:FATAL:TARGET_NOT_WRITABLE:{e}")
-        return False
+    # Проверяем возможность записи: access() без создания файла,
+    # O_TMPFILE - только если access() отказал (например, из-за ACL)
+    if not os.access(target_dir, os.W_OK):
+        try:
+            fd = os.open(target_dir, os.O_TMPFILE | os.O_WRONLY, 0o600)
+            os.close(fd)
+        except OSError as e:
+            emit(f"EVENT:FATAL:TARGET_NOT_WRITABLE:{e}")
+            return False
     
     return True
 
-def get_existing_backups(target_dir: Path) -> set:
-    """Возвращает set с именами уже существующих бэкапов"""
-    existing_files = set()
-    for ext in ('*.tar', '*.tar.gz'):
-        for f in target_dir.glob(ext):
-            existing_files.add(f.name)
-    return existing_files
+def get_existing_backups(target_dir: str) -> dict:
+    """Возвращает dict имя -> DirEntry уже существующих бэкапов"""
+    # Один readdir вместо двух glob-проходов; тип берётся из d_type,
+    # stat делается позже и только для совпавших по имени
+    with os.scandir(target_dir) as it:
+        return {
+            e.name: e for e in it
+            if e.name.endswith(BACKUP_SUFFIXES) and e.is_file(follow_symlinks=False)
+        }
+
+def copy_size(entry) -> int:
+    """Размер копии на USB или -1, если её не удалось прочитать"""
+    try:
+        return entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        return -1
+
+def list_backups(backup_dir: str) -> list:
+    """Возвращает DirEntry бэкапов за один проход по директории"""
+    with os.scandir(backup_dir) as it:
+        return [
+            e for e in it
+            if e.name.endswith(BACKUP_SUFFIXES) and e.is_file()
+        ]
 
 def main():
     # Получаем mount_point из аргументов
     if len(sys.argv) > 1:
         mount_point = sys.argv[1]
-        TARGET_DIR = Path(f"/media/{mount_point}")
+        TARGET_DIR = f"/media/{mount_point}"
     else:
         # Fallback: пытаемся получить из переменной окружения
         mount_point = os.getenv('MOUNT_POINT', 'baskups')
-        TARGET_DIR = Path(f"/media/{mount_point}")
+        TARGET_DIR = f"/media/{mount_point}"
     
     # Проверяем исходную директорию
-    if not BACKUP_DIR.exists():
+    try:
+        backup_st = os.stat(BACKUP_DIR)
+    except OSError:
         emit("EVENT:FATAL:BACKUP_DIR_NOT_FOUND")
         sys.exit(1)
     
-    if not BACKUP_DIR.is_dir():
+    if not stat.S_ISDIR(backup_st.st_mode):
         emit("EVENT:FATAL:BACKUP_NOT_DIR")
         sys.exit(1)
     
@@ -72,12 +106,7 @@ def main():
         emit(f"EVENT:SCANNER_EXISTING:{len(existing_files)}")
     
     # Поиск бэкапов
-    backups = []
-    for ext in ('*.tar', '*.tar.gz'):
-        backups.extend(BACKUP_DIR.glob(ext))
-    
-    # Сортируем по времени создания (старые первыми)
-    backups.sort(key=lambda p: p.stat().st_mtime)
+    backups = list_backups(BACKUP_DIR)
     
     if not backups:
         emit("EVENT:SCANNER_EMPTY")
@@ -85,24 +114,44 @@ def main():
     
     emit(f"EVENT:SCANNER_FOUND:{len(backups)}")
     
-    new_backups = 0
+    # Пропускаем только копии того же размера: обрезанная копия
+    # (например, после обрыва записи) ставится в очередь заново;
+    # дальше работаем с кортежами (name, path, mtime_ns) из строк DirEntry
+    pending = []
     skipped_backups = 0
-    
     for backup in backups:
-        if backup.name in existing_files:
+        try:
+            st = backup.stat()
+        except OSError:
+            # исчез или не читается между readdir и stat - не трогаем
+            continue
+        
+        copy = existing_files.get(backup.name)
+        if copy is not None and copy_size(copy) == st.st_size:
             emit(f"EVENT:SCANNER_SKIPPED:{backup.name}")
             skipped_backups += 1
-            continue
-            
+        else:
+            pending.append((backup.name, backup.path, st.st_mtime_ns))
+    flush_events()
+    
+    # Сортируем по времени создания (старые первыми)
+    pending.sort(key=itemgetter(2))
+    
+    # Вся пачка пишется в очередь одним open/write
+    if pending:
         try:
-            with QUEUE_FILE.open("a") as f:
-                f.write(str(backup) + "\n")
-            emit(f"EVENT:SCANNER_ENQUEUED:{backup}")
-            new_backups += 1
+            with open(QUEUE_FILE, "a") as f:
+                f.writelines(path + "\n" for _, path, _ in pending)
         except Exception as e:
             emit(f"EVENT:FATAL:QUEUE_WRITE_FAILED:{e}")
             sys.exit(1)
     
+    for _, path, _ in pending:
+        emit(f"EVENT:SCANNER_ENQUEUED:{path}")
+    flush_events()
+    
+    new_backups = len(pending)
+    
     emit(f"EVENT:SCANNER_DONE:{new_backups}")
     
     if skipped_backups > 0:
@@ -112,4 +161,8 @@ def main():
         emit("EVENT:SCANNER_ALL_EXIST")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        # в том числе FATAL-события перед sys.exit
+        flush_events()
\ No newline at end of file
@@ -1,46 +1,140 @@
 #!/usr/bin/env python3
 
+import os
 import time
 import sys
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+try:
+    from watchdog.observers.inotify import InotifyObserver
+except Exception:  # не Linux или libc без inotify
+    InotifyObserver = None
+
 BACKUP_DIR = Path("/backup")
 QUEUE_FILE = Path("/tmp/backup_sync.queue")
-WAIT_TIME = 300  # фиксировано
+BACKUP_SUFFIXES = (".tar", ".tar.gz")
+WAIT_TIME = 300  # столько секунд без роста размера считаем концом записи
+STABLE_INTERVAL = 5.0  # пауза между проверками размера
+# inotify присылает IN_CLOSE_WRITE: тогда ждём именно закрытия файла,
+# а тишина по размеру - только страховка на случай потерянного события
+CLOSE_EVENTS = InotifyObserver is not None and issubclass(Observer, InotifyObserver)
+CLOSE_WAIT_TIME = 3600
 
 
 def emit(event: str):
     print(event, flush=True)
 
 
+def wait_until_stable(path: str, closed: threading.Event = None,
+                      interval: float = STABLE_INTERVAL,
+                      quiet: float = WAIT_TIME) -> bool:
+    """Ждёт, пока размер файла не будет меняться quiet секунд подряд.
+
+    Supervisor может надолго замолкать посреди записи (останавливает
+    аддон, ждёт Core), поэтому окно тишины - минуты, а не пара замеров.
+    Если пришло событие закрытия файла после записи (closed),
+    ждать дальше не нужно. Возвращает False, если файл исчез.
+    """
+    last_size = -1
+    changed_at = time.monotonic()
+
+    while True:
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            return False
+
+        # IN_CLOSE_WRITE: HA закрыл файл, запись завершена
+        if closed is not None and closed.is_set():
+            return True
+
+        now = time.monotonic()
+        if size != last_size:
+            last_size = size
+            changed_at = now
+        elif now - changed_at >= quiet:
+            return True
+
+        if closed is not None:
+            closed.wait(interval)
+        else:
+            time.sleep(interval)
+
+
 class BackupHandler(FileSystemEventHandler):
+    def __init__(self, queue_fd: int):
+        super().__init__()
+        # очередь открыта один раз с O_APPEND: строка уходит одним write
+        self._queue_fd = queue_fd
+        # ожидание записи идёт в пуле, поток observer не блокируется
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bsync")
+        # путь -> Event, который выставляет on_closed
+        self._processing = {}
+        self._lock = threading.Lock()
+        # выставляется в shutdown(): ждущие воркеры выходят без записи
+        self._stopping = threading.Event()
+
     def on_created(self, event):
         if event.is_directory:
             return
 
-        path = Path(event.src_path)
+        src = event.src_path
 
-        # интересуют только tar-архивы
-        if not path.name.endswith(".tar") and not path.name.endswith(".tar.gz"):
+        # интересуют только tar-архивы; проверяем строку до создания Path,
+        # чтобы не аллоцировать объект на каждое чужое событие
+        if not src.endswith(BACKUP_SUFFIXES):
             return
 
-        emit(f"EVENT:NEW_BACKUP:{path}")
+        with self._lock:
+            if src in self._processing:
+                return
+            closed = self._processing[src] = threading.Event()
 
-        # ждём, пока HA закончит запись
-        time.sleep(WAIT_TIME)
+        emit(f"EVENT:NEW_BACKUP:{src}")
+        self._pool.submit(self._process, src, closed)
 
-        if not path.exists():
-            emit(f"EVENT:BACKUP_GONE:{path}")
-            return
+    def on_closed(self, event):
+        # Закрытие после записи: ожидающий этот файл поток можно будить
+        with self._lock:
+            closed = self._processing.get(event.src_path)
+        if closed is not None:
+            closed.set()
 
+    def _process(self, src: str, closed: threading.Event):
         try:
-            with QUEUE_FILE.open("a") as f:
-                f.write(str(path) + "\n")
-            emit(f"EVENT:ENQUEUED:{path}")
-        except Exception as e:
-            emit(f"EVENT:FATAL:QUEUE_WRITE_FAILED:{e}")
+            # ждём, пока HA закончит запись: закроет файл, а без событий
+            # закрытия - перестанет увеличивать размер; исчезновение
+            # файла видно по stat
+            quiet = CLOSE_WAIT_TIME if CLOSE_EVENTS else WAIT_TIME
+            if not wait_until_stable(src, closed, quiet=quiet):
+                emit(f"EVENT:BACKUP_GONE:{src}")
+                return
+
+            # остановка разбудила ожидание - файл мог быть не дописан
+            if self._stopping.is_set():
+                return
+
+            try:
+                os.write(self._queue_fd, (src + "\n").encode())
+                emit(f"EVENT:ENQUEUED:{src}")
+            except Exception as e:
+                emit(f"EVENT:FATAL:QUEUE_WRITE_FAILED:{e}")
+        finally:
+            with self._lock:
+                self._processing.pop(src, None)
+
+    def shutdown(self):
+        """Будит ждущие воркеры и дожидается их завершения"""
+        self._stopping.set()
+        with self._lock:
+            for closed in self._processing.values():
+                closed.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
 
 
 def main():
@@ -50,19 +144,32 @@ def main():
 
     emit("EVENT:WATCHER_STARTED")
 
-    event_handler = BackupHandler()
+    try:
+        queue_fd = os.open(QUEUE_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    except OSError as e:
+        emit(f"EVENT:FATAL:QUEUE_WRITE_FAILED:{e}")
+        sys.exit(1)
+
+    event_handler = BackupHandler(queue_fd)
     observer = Observer()
     observer.schedule(event_handler, str(BACKUP_DIR), recursive=False)
     observer.start()
 
+    # SIGTERM от supervisor останавливает observer; основной поток
+    # просто ждёт его в join() без периодических пробуждений
+    signal.signal(signal.SIGTERM, lambda *_: observer.stop())
+
     try:
-        while True:
-            time.sleep(1)
+        observer.join()
     except KeyboardInterrupt:
         pass
     finally:
         observer.stop()
         observer.join()
+        # Новых событий больше нет; shutdown() дожидается воркеров,
+        # так что ни один из них не пишет в дескриптор после close
+        event_handler.shutdown()
+        os.close(queue_fd)
 
 
 if __name__ == "__main__":